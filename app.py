@@ -7,20 +7,32 @@
 # and sends Slack notifications with detailed event information.
 
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 import hmac
-import hashlib
 import subprocess
-import json
+import signal
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
 import secrets
-import string
 import logging
+from logging.handlers import RotatingFileHandler, WatchedFileHandler, QueueHandler, QueueListener
 import threading
+import time
+import queue
+import re
+import atexit
+import fcntl
+import tempfile
 from datetime import datetime
-from collections import defaultdict
+from typing import NamedTuple
+from types import MappingProxyType
+from collections import defaultdict, deque
 from dotenv import load_dotenv
-from db_config import get_db_connection, execute_query
+from db_config import get_db_connection, execute_query, execute_many, ensure_index
+from mysql.connector import IntegrityError, errorcode
 
 load_dotenv()
 
@@ -28,13 +40,13 @@ load_dotenv()
 def load_config():
     """Load configuration from config.json file"""
     try:
-        with open('config.json', 'r') as f:
-            return json.load(f)
+        with open('config.json', 'rb') as f:
+            return orjson.loads(f.read())
     except FileNotFoundError:
         logger.error("config.json file not found")
         return None
-    except json.JSONDecodeError as e:
-        logger.error(f"Error parsing config.json: {e}")
+    except orjson.JSONDecodeError as e:
+        logger.error("Error parsing config.json: %s", e)
         return None
 
 # Global configuration
@@ -46,74 +58,372 @@ if not CONFIG:
 TABLE_PROJECTS = CONFIG['database']['tables']['projects']
 TABLE_WEBHOOK_EVENTS = CONFIG['database']['tables']['webhook_events']
 
-# Configure logging with detailed formatting
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('webhook_app.log', mode='w'),
-        logging.StreamHandler()
-    ]
+# Statements run repeatedly, built once so every call sends identical SQL text
+SELECT_PROJECTS_SQL = f"SELECT name, deploy_script, slack_webhook, secret FROM {TABLE_PROJECTS}"
+INSERT_PROJECT_SQL = f"INSERT INTO {TABLE_PROJECTS} (name, deploy_script, slack_webhook, secret) VALUES (%s, %s, %s, %s)"
+INSERT_EVENT_SQL = (
+    f"INSERT INTO {TABLE_WEBHOOK_EVENTS} "
+    "(project_name, repository_name, repository_url, clone_url, event_type, branch, commit_message, "
+    "commit_id, author_name, author_email, timestamp) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
 )
+
+# Allow webhooks without an X-GitHub-Project header to be matched by trying every project secret
+SIGNATURE_SCAN_FALLBACK = CONFIG['webhook'].get('signature_scan_fallback', True)
+
+# Number of background threads consuming the webhook work queue (WORKERS env overrides config.json)
+WORKER_COUNT = int(os.getenv('WORKERS', CONFIG['webhook'].get('workers', 4)))
+
+# Seconds a loaded project list is reused before it is read from MySQL again
+PROJECTS_CACHE_TTL = CONFIG['webhook'].get('projects_cache_ttl', 60)
+
+# Maximum seconds a deployment script may run before it is killed
+DEPLOY_TIMEOUT = CONFIG['webhook'].get('timeout', 300)
+
+# Seconds a timed-out deployment gets to exit after SIGTERM before its process group is sent SIGKILL
+DEPLOY_KILL_GRACE = CONFIG['webhook'].get('kill_grace', 10)
+
+# Threads dedicated to running deployment scripts
+DEPLOY_WORKER_COUNT = CONFIG['webhook'].get('deploy_workers', 2)
+
+# Directory receiving one output log per deployment run; unset keeps only stderr, in the app log
+DEPLOY_LOG_DIR = CONFIG['webhook'].get('deploy_log_dir')
+
+# Directory holding one lock file per project, shared by every worker process on this host
+DEPLOY_LOCK_DIR = CONFIG['webhook'].get('deploy_lock_dir') or os.path.join(tempfile.gettempdir(), 'git-webhooks-deploy-locks')
+
+# Characters replaced in deploy log and lock file names, so a project name cannot point outside their directory
+DEPLOY_LOG_UNSAFE = re.compile(r'[^a-z0-9_]+')
+
+# Seconds the process waits at exit for queued webhook jobs and events to finish
+SHUTDOWN_GRACE = CONFIG['webhook'].get('shutdown_grace', 30)
+
+# Webhook events are written in batches: the batch limit starts at EVENT_BATCH_MIN and doubles
+# up to EVENT_BATCH_MAX while bursts keep filling it; a batch is flushed after EVENT_FLUSH_INTERVAL seconds
+EVENT_BATCH_MIN = 100
+EVENT_BATCH_MAX = 500
+EVENT_FLUSH_INTERVAL = CONFIG['webhook'].get('event_flush_interval', 0.1)
+
+# Webhook jobs held for the background workers; new webhooks get a 503 while it is full
+WORK_QUEUE_SIZE = CONFIG['webhook'].get('queue_size', 1000)
+
+# Event rows held in memory for the writer; further events are dropped while it is full
+EVENT_QUEUE_SIZE = 10000
+
+# Slack posts per webhook URL: SLACK_RATE_LIMIT messages per second with bursts of SLACK_BURST;
+# notifications queued while waiting are merged into one message of up to SLACK_MAX_ATTACHMENTS.
+# The limit is kept per process, so N gunicorn workers may post up to N times this rate.
+SLACK_RATE_LIMIT = 1.0
+SLACK_BURST = 3
+SLACK_MAX_ATTACHMENTS = 20
+SLACK_MAX_RETRIES = 3
+
+# Rows returned by /webhook-events when no ?limit= is given, and the most a client may ask for
+EVENTS_PAGE_SIZE = 50
+EVENTS_PAGE_MAX = 200
+
+# MySQL named lock taken while tables and indexes are created, and how long to wait for it
+INIT_LOCK_NAME = 'git_webhooks_init'
+INIT_LOCK_TIMEOUT = 30
+
+# Seconds between background MySQL health checks
+DB_HEALTH_INTERVAL = 30
+
+# Largest webhook body accepted; bigger requests are refused before any hashing
+MAX_PAYLOAD_SIZE = CONFIG['webhook'].get('max_payload_size', 25 * 1024 * 1024)
+
+# Only well-formed GitHub SHA-256 signature headers are worth computing an HMAC for
+SIGNATURE_PATTERN = re.compile(r'sha256=[0-9a-f]{64}')
+
+# Bytes read from the request body per step while the signature is computed
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Configure logging from config.json; the log file is appended to and rotated instead of truncated on start.
+# LOG_LEVEL=WARNING in the environment keeps only problems in production.
+LOG_CONFIG = CONFIG.get('logging', {})
+LOG_FILE = LOG_CONFIG.get('file', 'webhook_app.log')
+
+# "size" rotates inside the app, which is only safe with a single process writing the file.
+# "external" leaves rotation to logrotate and reopens the file when it is moved, so several
+# processes (gunicorn workers) can share it; gunicorn_conf.py selects it through LOG_ROTATION.
+LOG_ROTATION = os.getenv('LOG_ROTATION', LOG_CONFIG.get('rotation', 'size'))
+if LOG_ROTATION == 'external':
+    _file_handler = WatchedFileHandler(LOG_FILE)
+else:
+    _file_handler = RotatingFileHandler(
+        LOG_FILE,
+        maxBytes=LOG_CONFIG.get('max_bytes', 10_000_000),
+        backupCount=LOG_CONFIG.get('backup_count', 3)
+    )
+LOG_HANDLERS = [_file_handler, logging.StreamHandler()]
+for _handler in LOG_HANDLERS:
+    _handler.setFormatter(logging.Formatter(LOG_CONFIG.get('format', '%(asctime)s - %(levelname)s - %(message)s')))
+
+# Threads only put records on a queue; a single listener thread does the file and console writes
+_log_handler = QueueHandler(queue.SimpleQueue())
+_log_handler.setFormatter(logging.Formatter('%(message)s'))
+_log_listener = None
+
+def _is_log_level(name):
+    """Whether name is a logging level name (getLevelName returns "Level <name>" for unknown ones)"""
+    return isinstance(logging.getLevelName(name), int)
+
+# An unknown LOG_LEVEL falls back to the config.json level (then INFO) instead of failing the import
+CONFIG_LOG_LEVEL = str(LOG_CONFIG.get('level', 'INFO')).upper()
+if not _is_log_level(CONFIG_LOG_LEVEL):
+    CONFIG_LOG_LEVEL = 'INFO'
+LOG_LEVEL = os.getenv('LOG_LEVEL', CONFIG_LOG_LEVEL).upper()
+_invalid_log_level = None
+if not _is_log_level(LOG_LEVEL):
+    _invalid_log_level, LOG_LEVEL = LOG_LEVEL, CONFIG_LOG_LEVEL
+logging.basicConfig(level=LOG_LEVEL, handlers=[_log_handler])
 logger = logging.getLogger(__name__)
 
+def start_log_listener():
+    """Start the log writer thread on a fresh queue (threads do not survive a fork, and the parent drains its own queue)"""
+    global _log_listener
+    _log_handler.queue = queue.SimpleQueue()
+    _log_listener = QueueListener(_log_handler.queue, *LOG_HANDLERS, respect_handler_level=True)
+    _log_listener.start()
+
+@atexit.register
+def stop_log_listener():
+    """Write out queued log records before exit; registered first so it runs after the other exit hooks"""
+    if _log_listener:
+        _log_listener.stop()
+
+start_log_listener()
+os.register_at_fork(after_in_child=start_log_listener)
+if _invalid_log_level is not None:
+    logger.warning("Unknown LOG_LEVEL %r, using %s", _invalid_log_level, LOG_LEVEL)
+
+# Shared HTTP session so Slack posts reuse pooled keep-alive connections
+SLACK_SESSION = requests.Session()
+# Transient Slack 5xx responses are retried with backoff; 429 is left to the per-URL rate limiter.
+# Read (and other post-send) errors are not retried: Slack may already have posted the message, and a
+# retry would post it twice. Connect errors are, since the request never reached Slack.
+SLACK_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(
+        total=3,
+        read=0,
+        other=0,
+        backoff_factor=0.5,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=frozenset(['POST']),
+        raise_on_status=False
+    )
+))
+
+# Banner line framing each log_section
+_SECTION_DIVIDER = "#" * 60
+
 def log_section(title, details=None):
     """Log a formatted section with title and optional details"""
-    logger.info("#" * 60)
-    logger.info(f"# {title}")
-    logger.info("#" * 60)
+    logger.info(_SECTION_DIVIDER)
+    logger.info("# %s", title)
+    logger.info(_SECTION_DIVIDER)
     if details:
         for key, value in details.items():
-            logger.info(f"# {key}: {value}")
-        logger.info("#" * 60)
+            logger.info("# %s: %s", key, value)
+        logger.info(_SECTION_DIVIDER)
 
-def process_webhook_background(project_config, payload_data, event):
-    """Process webhook in background thread for fast response"""
+# Failures swallowed by background paths, counted per kind and reported by /debug
+FAILURE_COUNTS = defaultdict(int)
+_failure_lock = threading.Lock()
+
+def record_failure(kind):
+    """Count a handled failure so silent error paths still show up in /debug"""
+    with _failure_lock:
+        FAILURE_COUNTS[kind] += 1
+
+# Push payloads name the branch as refs/heads/<branch>; anything else (tags, etc.) has no branch
+BRANCH_REF_PREFIX = 'refs/heads/'
+
+class WebhookEvent(NamedTuple):
+    """Fields of a push payload used by the event log and Slack, extracted once per webhook"""
+    repo_name: str
+    repo_url: str
+    clone_url: str
+    branch: str
+    commit_message: str
+    commit_id: str
+    author_name: str
+    author_email: str
+    timestamp: str
+
+    @classmethod
+    def from_payload(cls, payload_data):
+        """Build the event from a parsed webhook payload, applying the defaults for missing fields"""
+        # GitHub sends "head_commit": null for branch deletions, so fall back on falsy values, not only missing keys
+        repository = payload_data.get('repository') or {}
+        ref = payload_data.get('ref') or ''
+        head_commit = payload_data.get('head_commit') or {}
+        author = head_commit.get('author') or {}
+        timestamp = head_commit.get('timestamp')
+        return cls(
+            repo_name=repository.get('name', 'Unknown'),
+            repo_url=repository.get('html_url', 'N/A'),
+            clone_url=repository.get('clone_url', 'N/A'),
+            branch=ref[len(BRANCH_REF_PREFIX):] if ref.startswith(BRANCH_REF_PREFIX) else 'Unknown',
+            commit_message=head_commit.get('message', 'N/A'),
+            commit_id=head_commit.get('id', 'N/A'),
+            author_name=author.get('name', 'Unknown'),
+            author_email=author.get('email', 'Unknown'),
+            timestamp=timestamp if timestamp is not None else datetime.now().isoformat()
+        )
+
+def _run_step(kind, fn, *args):
+    """Run one background step, logging and counting its failure without stopping the other steps"""
     try:
-        logger.info(f"🚀 Background processing started for {project_config['name']}")
-        
-        # Save to database
-        logger.info(f"📝 Step 1/3: Saving event to database...")
-        save_webhook_event(project_config['name'], payload_data, event)
-        
-        # Send Slack notification
-        if project_config.get('slack_webhook'):
-            logger.info(f"📱 Step 2/3: Sending Slack notification...")
-            send_slack_notification(project_config['slack_webhook'], payload_data, project_config['name'])
-        else:
-            logger.info(f"⏭️ Step 2/3: Skipped - No Slack webhook configured")
-        
-        # Execute deployment script
-        if project_config.get('deploy_script'):
-            logger.info(f"⚙️ Step 3/3: Executing deployment script...")
-            execute_deployment_script(project_config['deploy_script'], project_config['name'])
-        else:
-            logger.info(f"⏭️ Step 3/3: Skipped - No deployment script configured")
-            
-        log_section("BACKGROUND PROCESSING COMPLETE", {
-            "Project": project_config['name'],
-            "Status": "SUCCESS",
-            "Thread": threading.current_thread().name
-        })
-            
+        fn(*args)
+        return True
     except Exception as e:
-        logger.error(f"❌ BACKGROUND ERROR: Processing failed - {e}")
-        logger.error(f"   Project: {project_config['name']}")
+        record_failure(kind)
+        logger.exception("BACKGROUND ERROR: %s failed - %s", fn.__name__, e)
+        return False
+
+def process_webhook_background(project_config, payload_data, event):
+    """Process webhook in background thread for fast response"""
+    # The event save, Slack post and deployment run concurrently on their own queues;
+    # each is handed off separately so one failing does not cancel the others
+    name = project_config['name']
+    webhook_event = WebhookEvent.from_payload(payload_data)
+    _run_step('event_save', save_webhook_event, name, webhook_event, event)
+    
+    slack = 'skipped'
+    if project_config.get('slack_webhook'):
+        queued = _run_step('slack', enqueue_job, send_slack_notification, project_config['slack_webhook'], webhook_event, name)
+        slack = 'queued' if queued else 'failed'
+    
+    deploy = 'skipped'
+    if project_config.get('deploy_script'):
+        queued = _run_step('deploy', enqueue_deploy, project_config['deploy_script'], name)
+        deploy = f"queued ({_deploy_q.qsize()} pending)" if queued else 'failed'
+    
+    logger.info("webhook.dispatched project=%s event=%s slack=%s deploy=%s", name, event, slack, deploy)
+
+# Jobs waiting for a background worker, as (function, args) tuples. Deployments have their own
+# queue and workers so long-running scripts cannot hold up Slack notifications and event saves.
+_work_q = queue.Queue(maxsize=WORK_QUEUE_SIZE)
+_deploy_q = queue.Queue()
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+# One lock per project so two threads never run the same deployment script at once;
+# execute_deployment_script also takes a file lock so other worker processes wait too
+_deploy_locks = defaultdict(threading.Lock)
+_deploy_locks_lock = threading.Lock()
+
+def _worker(q):
+    """Run jobs from q one after another for the lifetime of the process"""
+    while True:
+        fn, args = q.get()
+        try:
+            fn(*args)
+        except Exception as e:
+            record_failure('worker')
+            logger.exception("WORKER ERROR: %s failed - %s", fn.__name__, e)
+        finally:
+            q.task_done()
+
+def start_workers(count):
+    """Start the background worker threads once per process (threads do not survive a fork)"""
+    global _workers_pid
+    if _workers_pid == os.getpid():
+        return
+    with _workers_lock:
+        if _workers_pid == os.getpid():
+            return
+        _workers_pid = os.getpid()
+        for i in range(count):
+            threading.Thread(target=_worker, args=(_work_q,), name=f"webhook-worker-{i + 1}", daemon=True).start()
+        for i in range(DEPLOY_WORKER_COUNT):
+            threading.Thread(target=_worker, args=(_deploy_q,), name=f"deploy-worker-{i + 1}", daemon=True).start()
+        threading.Thread(target=_event_writer, name="event-writer", daemon=True).start()
+        threading.Thread(target=_projects_refresher, name="projects-refresher", daemon=True).start()
+        threading.Thread(target=_db_health_checker, name="db-health", daemon=True).start()
+    logger.info("Started %s background and %s deploy worker threads in process %s", count, DEPLOY_WORKER_COUNT, _workers_pid)
+
+def enqueue_job(fn, *args):
+    """Queue a job for the background workers, starting them on first use in this process; raises queue.Full when saturated"""
+    start_workers(WORKER_COUNT)
+    _work_q.put_nowait((fn, args))
+
+def enqueue_deploy(deploy_script, project_name):
+    """Queue a deployment script for the deploy workers"""
+    start_workers(WORKER_COUNT)
+    _deploy_q.put((execute_deployment_script, (deploy_script, project_name)))
+
+@atexit.register
+def drain_queues():
+    """Give queued webhook jobs and events up to SHUTDOWN_GRACE seconds to finish before exit"""
+    if _workers_pid != os.getpid():
+        return
+    deadline = time.monotonic() + SHUTDOWN_GRACE
+    for q in (_work_q, _deploy_q, _events_q):
+        while q.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.1)
+    pending = _work_q.unfinished_tasks + _deploy_q.unfinished_tasks + _events_q.unfinished_tasks
+    if pending:
+        logger.warning("SHUTDOWN: %s queued jobs/events not finished after %s seconds", pending, SHUTDOWN_GRACE)
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, keeping Flask's sorted keys and HTTP date format"""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 # Initialize the Flask app instance
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+app.config['MAX_CONTENT_LENGTH'] = MAX_PAYLOAD_SIZE
+
+@app.before_request
+def ensure_background_threads():
+    """Start this process's background threads on its first request of any kind, so /debug health is live"""
+    start_workers(WORKER_COUNT)
+
+@app.before_request
+def reject_unverifiable_webhooks():
+    """Turn away oversized bodies and malformed signatures on the webhook route before hashing anything"""
+    if request.endpoint != 'handle_webhook':
+        return None
+    if request.content_length is not None and request.content_length > MAX_PAYLOAD_SIZE:
+        logger.warning("PAYLOAD TOO LARGE: %s bytes from %s", request.content_length, request.remote_addr)
+        return jsonify({"error": f"Payload exceeds {MAX_PAYLOAD_SIZE} bytes"}), 413
+    if not SIGNATURE_PATTERN.fullmatch(request.headers.get('X-Hub-Signature-256', '')):
+        logger.warning("MALFORMED SIGNATURE: %s from %s", request.path, request.remote_addr)
+        return jsonify({"error": "Missing or malformed X-Hub-Signature-256 header"}), 400
+    return None
 
 def init_database():
     """Initialize MySQL database with sample projects if tables don't exist"""
-    logger.info(f"Starting database initialization with tables: {TABLE_PROJECTS}, {TABLE_WEBHOOK_EVENTS}")
+    logger.info("Starting database initialization with tables: %s, %s", TABLE_PROJECTS, TABLE_WEBHOOK_EVENTS)
     connection = get_db_connection()
     if not connection:
         logger.error("Failed to connect to MySQL database")
         return
     
+    cursor = None
     try:
         cursor = connection.cursor()
         
+        # Workers started without preload_app, or on several hosts, would otherwise race on CREATE TABLE;
+        # the named lock belongs to this session and is also dropped if the connection goes away
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (INIT_LOCK_NAME, INIT_LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            logger.warning("Timed out waiting for the %s lock, initializing anyway", INIT_LOCK_NAME)
+        
         # Check if projects table exists
         cursor.execute(f"SHOW TABLES LIKE '{TABLE_PROJECTS}'")
         if not cursor.fetchone():
@@ -136,13 +446,13 @@ def init_database():
                     repository_name VARCHAR(255),
                     repository_url TEXT,
                     clone_url TEXT,
-                    event_type VARCHAR(100),
+                    event_type VARCHAR(64),
                     branch VARCHAR(255),
                     commit_message TEXT,
-                    commit_id VARCHAR(255),
+                    commit_id VARCHAR(64),
                     author_name VARCHAR(255),
                     author_email VARCHAR(255),
-                    timestamp VARCHAR(255),
+                    timestamp VARCHAR(32),
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
@@ -154,187 +464,493 @@ def init_database():
                 ("Test Project", "/path/to/test/deploy.sh", "https://hooks.slack.com/test")
             ]
             
-            for name, script, webhook in projects:
-                secret = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(32))
-                cursor.execute(
-                    f"INSERT INTO {TABLE_PROJECTS} (name, deploy_script, slack_webhook, secret) VALUES (%s, %s, %s, %s)",
-                    (name, script, webhook, secret)
-                )
+            # 24 random bytes -> 32 URL-safe characters, read from os.urandom in one call;
+            # executemany sends every sample row in a single multi-row INSERT
+            cursor.executemany(
+                INSERT_PROJECT_SQL,
+                [(name, script, webhook, secrets.token_urlsafe(24)) for name, script, webhook in projects]
+            )
             
             connection.commit()
-            logger.info(f"MySQL database initialized with tables: {TABLE_PROJECTS}, {TABLE_WEBHOOK_EVENTS}")
+            logger.info("MySQL database initialized with tables: %s, %s", TABLE_PROJECTS, TABLE_WEBHOOK_EVENTS)
         else:
-            logger.info(f"Database tables already exist: {TABLE_PROJECTS}")
+            logger.info("Database tables already exist: %s", TABLE_PROJECTS)
         
-        cursor.close()
-        connection.close()
+        # Indexes are checked on every start so existing deployments pick them up too
+        ensure_index(cursor, TABLE_WEBHOOK_EVENTS, 'idx_events_created_at', 'created_at')
+        ensure_index(cursor, TABLE_WEBHOOK_EVENTS, 'idx_events_project_created_at', 'project_name, created_at')
+        try:
+            ensure_index(cursor, TABLE_PROJECTS, 'idx_projects_name', 'name', unique=True)
+        except Exception as e:
+            logger.warning("Could not add unique index on %s(name), check for duplicate project names: %s", TABLE_PROJECTS, e)
     except Exception as e:
-        logger.error(f"Error initializing database: {e}")
-        if connection:
-            connection.close()
+        logger.error("Error initializing database: %s", e)
+    finally:
+        # Release the lock and hand the connection back to the pool even when a statement failed
+        try:
+            if cursor:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (INIT_LOCK_NAME,))
+                cursor.fetchone()
+                cursor.close()
+        except Exception as e:
+            logger.warning("Could not release the %s lock: %s", INIT_LOCK_NAME, e)
+        connection.close()
+
+# Set while the last MySQL health check succeeded; kept current by the db-health thread
+_db_healthy = threading.Event()
+
+def check_database():
+    """Ping MySQL with SELECT 1 and update the health flag, logging only when it changes"""
+    healthy = execute_query("SELECT 1", fetch=True) is not None
+    if healthy != _db_healthy.is_set():
+        if healthy:
+            logger.info("Database connection restored")
+        else:
+            logger.error("Database health check failed")
+    if healthy:
+        _db_healthy.set()
+    else:
+        _db_healthy.clear()
+    return healthy
+
+def _db_health_checker():
+    """Re-check the database every DB_HEALTH_INTERVAL seconds"""
+    while True:
+        try:
+            check_database()
+        except Exception as e:
+            _db_healthy.clear()
+            logger.exception("Error checking database health: %s", e)
+        time.sleep(DB_HEALTH_INTERVAL)
+
+# Spaces and hyphens in project names both become underscores in project keys
+_PROJECT_KEY_TRANS = str.maketrans({" ": "_", "-": "_"})
+
+def get_project_key(name):
+    """Normalize a project name into the key used in PROJECTS"""
+    return name.lower().translate(_PROJECT_KEY_TRANS)
+
+def build_project_config(name, deploy_script, slack_webhook, secret):
+    """Build one read-only project configuration, precomputing the keyed HMAC state once"""
+    config = {
+        'deploy_script': deploy_script,
+        'slack_webhook': slack_webhook,
+        'secret': secret,
+        'name': name
+    }
+    if secret:
+        # Each webhook only copies the template instead of re-keying HMAC from the secret.
+        # The digest name (not a constructor) always selects OpenSSL's C HMAC, even if hashlib.sha256 is the builtin.
+        secret_bytes = secret.encode()
+        config['_secret_bytes'] = secret_bytes
+        config['_hmac_template'] = hmac.new(secret_bytes, b'', 'sha256')
+    return MappingProxyType(config)
 
 def load_projects_from_database():
     """Load project configurations directly from MySQL database"""
-    logger.info(f"Loading projects from table: {TABLE_PROJECTS}")
-    projects = defaultdict(dict)
+    logger.info("Loading projects from table: %s", TABLE_PROJECTS)
     
     try:
-        db_projects = execute_query(f"SELECT name, deploy_script, slack_webhook, secret FROM {TABLE_PROJECTS}", fetch=True)
-        
-        if db_projects:
-            for name, deploy_script, slack_webhook, secret in db_projects:
-                project_key = name.lower().replace(" ", "_").replace("-", "_")
-                projects[project_key] = {
-                    'deploy_script': deploy_script,
-                    'slack_webhook': slack_webhook,
-                    'secret': secret,
-                    'name': name
-                }
-            logger.info(f"Loaded {len(projects)} projects from database")
-        else:
-            logger.warning("No projects found in database")
+        db_projects = execute_query(SELECT_PROJECTS_SQL, fetch=True)
     except Exception as e:
-        logger.error(f"Error loading projects from database: {e}")
+        logger.error("Error loading projects from database: %s", e)
+        db_projects = None
+    
+    # None means the query failed, unlike an empty table; the caller keeps its previous list
+    if db_projects is None:
+        logger.error("Could not load projects from database")
+        return None
     
+    # Read-only configs can be shared by every request thread without copying
+    projects = {get_project_key(row[0]): build_project_config(*row) for row in db_projects}
+    
+    if projects:
+        logger.info("Loaded %s projects from database", len(projects))
+    else:
+        logger.warning("No projects found in database")
     return projects
 
-def send_slack_notification(slack_webhook, payload_data, project_name):
+# Last loaded project list, the monotonic time it was last loaded or retried at (None forces a reload),
+# and the (row count, max id) of the projects table it was loaded from
+_projects_cache = {'data': None, 't': None, 'version': None}
+_projects_lock = threading.Lock()
+
+def _projects_stale():
+    """Whether the project list was never loaded, was invalidated or is older than PROJECTS_CACHE_TTL"""
+    t = _projects_cache['t']
+    return _projects_cache['data'] is None or t is None or time.monotonic() - t >= PROJECTS_CACHE_TTL
+
+def reload_projects():
+    """Reload the project list from MySQL (call with _projects_lock held); returns whether the query succeeded"""
+    global PROJECTS
+    projects = load_projects_from_database()
+    # A failed reload keeps serving the previous list and waits a full TTL before trying again,
+    # so a short database outage does not turn every webhook into a 404
+    if projects is not None:
+        _projects_cache['data'] = PROJECTS = projects
+    _projects_cache['t'] = time.monotonic()
+    return projects is not None
+
+def get_projects():
+    """Return project configurations, reloading from MySQL when the cache is empty or expired"""
+    # Checked again under the lock so concurrent requests on a cold cache share a single SELECT
+    if _projects_stale():
+        with _projects_lock:
+            if _projects_stale():
+                reload_projects()
+    return _projects_cache['data'] if _projects_cache['data'] is not None else {}
+
+def invalidate_projects_cache():
+    """Force the next get_projects() call to reload from MySQL"""
+    _projects_cache['t'] = None
+
+def get_projects_version():
+    """Return (row count, max id) of the projects table, a cheap stand-in for a full reload"""
+    result = execute_query(f"SELECT COUNT(*), MAX(id) FROM {TABLE_PROJECTS}", fetch=True)
+    return tuple(result[0]) if result else None
+
+def _projects_refresher():
+    """Reload the projects cache as soon as projects are added or removed"""
+    while True:
+        time.sleep(PROJECTS_CACHE_TTL)
+        try:
+            version = get_projects_version()
+            if version is None:
+                continue
+            if version != _projects_cache['version']:
+                logger.info("Projects table changed %s -> %s, reloading", _projects_cache['version'], version)
+                with _projects_lock:
+                    loaded = reload_projects()
+                # A failed reload leaves the old version so the next check tries again
+                if loaded:
+                    _projects_cache['version'] = version
+            # An unchanged version does not extend the TTL: in-place UPDATEs of a secret, Slack URL or
+            # deploy script keep (COUNT, MAX(id)) the same and are only picked up by the TTL reload
+        except Exception as e:
+            record_failure('projects_refresh')
+            logger.exception("Error refreshing projects cache: %s", e)
+
+def _build_slack_template():
+    """Serialize the Slack attachment skeleton once, leaving a %s slot for each variable value"""
+    skeleton = {
+        "color": "good",
+        "fields": [
+            {"title": "Repository", "value": "__REPO__", "short": True},
+            {"title": "Branch", "value": "__BRANCH__", "short": True},
+            {"title": "Commit", "value": "__COMMIT__", "short": True},
+            {"title": "Author", "value": "__AUTHOR__", "short": True},
+            {"title": "Message", "value": "__MESSAGE__", "short": False}
+        ]
+    }
+    template = orjson.dumps(skeleton).replace(b'%', b'%%')
+    for sentinel in (b'"__REPO__"', b'"__BRANCH__"', b'"__COMMIT__"', b'"__AUTHOR__"', b'"__MESSAGE__"'):
+        template = template.replace(sentinel, b'%s')
+    return template
+
+_SLACK_TEMPLATE = _build_slack_template()
+
+def format_slack_attachment(repo_name, branch, commit_id, author_name, commit_message):
+    """Fill the pre-serialized Slack attachment template; each value is JSON-encoded on its own"""
+    dumps = orjson.dumps
+    return _SLACK_TEMPLATE % (
+        dumps(repo_name),
+        dumps(branch),
+        dumps(commit_id),
+        dumps(author_name),
+        dumps(commit_message)
+    )
+
+def format_slack_payload(text, attachments):
+    """Join the message text and already serialized attachments into one Slack payload"""
+    return b'{"text":%s,"attachments":[%s]}' % (orjson.dumps(text), b','.join(attachments))
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens per second up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, tokens=1):
+        """Take tokens if available; otherwise return the seconds until they will be"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0
+            return (tokens - self.tokens) / self.rate
+
+# Per webhook URL: rate limit bucket, (project name, attachment) pairs waiting to be posted,
+# and whether a worker is currently posting them
+_slack_buckets = {}
+_slack_pending = defaultdict(deque)
+_slack_flushing = set()
+_slack_lock = threading.Lock()
+
+def send_slack_notification(slack_webhook, webhook_event, project_name):
     """Send Slack notification with webhook details"""
-    log_section("SLACK NOTIFICATION", {
-        "Project": project_name,
-        "Webhook URL": slack_webhook[:50] + "...",
-        "Status": "Preparing"
-    })
-    
     try:
-        repository = payload_data.get('repository', {})
-        repo_name = repository.get('name', 'Unknown')
-        ref = payload_data.get('ref', '')
-        branch = ref.split('/')[-1] if 'refs/heads/' in ref else 'Unknown'
+        commit_id = webhook_event.commit_id[:7]
         
-        head_commit = payload_data.get('head_commit', {})
-        commit_message = head_commit.get('message', 'N/A')
-        commit_id = head_commit.get('id', 'N/A')[:7]
+        logger.debug("slack.prepare project=%s url=%.50s... repo=%s branch=%s commit=%s author=%s message=%.100r",
+                     project_name, slack_webhook, webhook_event.repo_name, webhook_event.branch, commit_id,
+                     webhook_event.author_name, webhook_event.commit_message)
         
-        author = head_commit.get('author', {})
-        author_name = author.get('name', 'Unknown')
+        attachment = format_slack_attachment(webhook_event.repo_name, webhook_event.branch, commit_id,
+                                             webhook_event.author_name, webhook_event.commit_message)
         
-        logger.info(f"📤 Preparing Slack message:")
-        logger.info(f"   Repository: {repo_name}")
-        logger.info(f"   Branch: {branch}")
-        logger.info(f"   Commit: {commit_id}")
-        logger.info(f"   Author: {author_name}")
-        logger.info(f"   Message: {commit_message[:100]}...")
+        # Queue the attachment; if another worker is already posting to this URL it picks it up
+        with _slack_lock:
+            _slack_pending[slack_webhook].append((project_name, attachment))
+            if slack_webhook in _slack_flushing:
+                logger.debug("slack.coalesced project=%s pending=%s", project_name, len(_slack_pending[slack_webhook]))
+                return
+            _slack_flushing.add(slack_webhook)
+            bucket = _slack_buckets.setdefault(slack_webhook, TokenBucket(SLACK_RATE_LIMIT, SLACK_BURST))
         
-        message = {
-            "text": f"🚀 Deployment triggered for {project_name}",
-            "attachments": [{
-                "color": "good",
-                "fields": [
-                    {"title": "Repository", "value": repo_name, "short": True},
-                    {"title": "Branch", "value": branch, "short": True},
-                    {"title": "Commit", "value": commit_id, "short": True},
-                    {"title": "Author", "value": author_name, "short": True},
-                    {"title": "Message", "value": commit_message, "short": False}
-                ]
-            }]
-        }
+        try:
+            flush_slack_notifications(slack_webhook, bucket)
+        except Exception:
+            # A clean flush clears the flag itself; after a failure the next push to this URL takes over
+            with _slack_lock:
+                _slack_flushing.discard(slack_webhook)
+            raise
+            
+    except Exception as e:
+        record_failure('slack')
+        logger.error("slack.error project=%s - %s", project_name, e)
+
+def flush_slack_notifications(slack_webhook, bucket):
+    """Post pending attachments for one URL within its rate limit, merging whatever queued up meanwhile"""
+    retries = 0
+    while True:
+        # Checked before taking a token, and the flag is cleared under the same lock that saw the queue empty,
+        # so an attachment queued concurrently is either flushed here or starts a new flush
+        with _slack_lock:
+            if not _slack_pending[slack_webhook]:
+                _slack_flushing.discard(slack_webhook)
+                return
+        
+        wait = bucket.consume()
+        while wait:
+            time.sleep(wait)
+            wait = bucket.consume()
         
-        logger.info(f"🌐 Sending POST request to Slack...")
-        response = requests.post(slack_webhook, json=message, timeout=10)
+        # Only the flusher holding the flag removes items, so the queue is still non-empty here
+        with _slack_lock:
+            pending = _slack_pending[slack_webhook]
+            batch = [pending.popleft() for _ in range(min(len(pending), SLACK_MAX_ATTACHMENTS))]
+        
+        names = list(dict.fromkeys(name for name, _ in batch))
+        text = f"🚀 Deployment triggered for {', '.join(names)}"
+        if len(batch) > 1:
+            text += f" ({len(batch)} pushes)"
+        message = format_slack_payload(text, [attachment for _, attachment in batch])
+        
+        response = SLACK_SESSION.post(
+            slack_webhook,
+            data=message,
+            headers={"Content-Type": "application/json"},
+            timeout=(2, 5)
+        )
         
         if response.status_code == 200:
-            logger.info(f"✅ SUCCESS: Slack notification sent successfully")
-            logger.info(f"   Response: {response.status_code} - Message delivered")
+            retries = 0
+            logger.info("slack.sent projects=%s attachments=%s status=200", ', '.join(names), len(batch))
+        elif response.status_code == 429 and retries < SLACK_MAX_RETRIES:
+            # Rate limited: wait as long as Slack asks, then resend the same batch first
+            retries += 1
+            try:
+                retry_after = int(response.headers.get('Retry-After', 1))
+            except ValueError:
+                retry_after = 1
+            logger.warning("RATE LIMITED: Slack asked to retry after %ss (attempt %s/%s)", retry_after, retries, SLACK_MAX_RETRIES)
+            with _slack_lock:
+                _slack_pending[slack_webhook].extendleft(reversed(batch))
+            time.sleep(retry_after)
         else:
-            logger.error(f"❌ FAILED: Slack notification failed")
-            logger.error(f"   Status Code: {response.status_code}")
-            logger.error(f"   Response: {response.text[:200]}")
-            
-    except Exception as e:
-        logger.error(f"❌ ERROR: Slack notification exception - {e}")
+            retries = 0
+            logger.error("slack.failed projects=%s status=%s response=%.200r", ', '.join(names), response.status_code, response.text)
+            record_failure('slack')
 
 def execute_deployment_script(deploy_script, project_name):
+    """Execute deployment script, waiting for any deployment of the same project still running"""
+    with _deploy_locks_lock:
+        lock = _deploy_locks[project_name]
+    if lock.locked():
+        logger.info("Waiting for the running %s deployment to finish...", project_name)
+    with lock:
+        lock_path = os.path.join(DEPLOY_LOCK_DIR, f"{DEPLOY_LOG_UNSAFE.sub('_', get_project_key(project_name))}.lock")
+        try:
+            os.makedirs(DEPLOY_LOCK_DIR, exist_ok=True)
+            lock_file = open(lock_path, 'a')
+        except OSError as e:
+            # Without the file lock only this process is serialized; still deploy rather than drop the push
+            record_failure('deploy_lock')
+            logger.error("deploy.lock_error project=%s lock=%s - %s, deploying without the cross-process lock",
+                         project_name, lock_path, e)
+            run_deployment_script(deploy_script, project_name)
+            return
+        # Closing the file releases the flock, also if the deployment raises
+        with lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info("Waiting for the %s deployment running in another worker to finish...", project_name)
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            run_deployment_script(deploy_script, project_name)
+
+def run_deployment_script(deploy_script, project_name):
     """Execute deployment script"""
-    log_section("DEPLOYMENT SCRIPT EXECUTION", {
-        "Project": project_name,
-        "Script Path": deploy_script,
-        "Status": "Starting"
-    })
-    
     try:
-        logger.info(f"🔧 Preparing to execute deployment script...")
-        logger.info(f"   Script: {deploy_script}")
-        logger.info(f"   Timeout: 300 seconds")
-        
         start_time = datetime.now()
-        logger.info(f"⏰ Execution started at: {start_time.strftime('%H:%M:%S')}")
+        logger.debug("deploy.start project=%s script=%s timeout=%ss", project_name, deploy_script, DEPLOY_TIMEOUT)
         
-        result = subprocess.run(["/usr/bin/sudo", deploy_script], capture_output=True, text=True, timeout=300)
+        # Output goes straight to a per-run log file when DEPLOY_LOG_DIR is set, so nothing is buffered here;
+        # otherwise standard output is discarded and only stderr is kept for diagnostics
+        log_path = None
+        log_file = None
+        if DEPLOY_LOG_DIR:
+            log_name = DEPLOY_LOG_UNSAFE.sub('_', get_project_key(project_name))
+            log_path = os.path.join(DEPLOY_LOG_DIR, f"{log_name}-{start_time:%Y%m%d-%H%M%S-%f}.log")
+            try:
+                os.makedirs(DEPLOY_LOG_DIR, exist_ok=True)
+                log_file = open(log_path, 'wb')
+            except OSError as e:
+                # A broken log directory must not block the deployment itself
+                record_failure('deploy_log')
+                logger.error("deploy.log_error project=%s log=%s - %s, deploying without a log file", project_name, log_path, e)
+                log_path = None
         
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
+        # Run in its own session so a timeout can kill the whole process group
+        try:
+            proc = subprocess.Popen(
+                ["/usr/bin/sudo", deploy_script],
+                stdout=log_file or subprocess.DEVNULL,
+                stderr=subprocess.STDOUT if log_file else subprocess.PIPE,
+                start_new_session=True
+            )
+            try:
+                _, stderr = proc.communicate(timeout=DEPLOY_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                stop_deployment(proc, project_name)
+                raise
+        finally:
+            if log_file:
+                log_file.close()
         
-        logger.info(f"⏱️ Execution completed in {duration:.2f} seconds")
-        logger.info(f"📊 Return Code: {result.returncode}")
+        duration = (datetime.now() - start_time).total_seconds()
         
-        if result.returncode == 0:
-            logger.info(f"✅ SUCCESS: Deployment script executed successfully")
-            if result.stdout:
-                logger.info(f"📝 Script Output: {result.stdout[:500]}")
+        if proc.returncode == 0:
+            logger.info("deploy.finished project=%s script=%s rc=0 duration=%.2fs log=%s",
+                        project_name, deploy_script, duration, log_path)
         else:
-            logger.error(f"❌ FAILED: Deployment script execution failed")
-            logger.error(f"   Return Code: {result.returncode}")
-            if result.stderr:
-                logger.error(f"   Error Output: {result.stderr[:500]}")
-            if result.stdout:
-                logger.error(f"   Standard Output: {result.stdout[:500]}")
+            record_failure('deploy')
+            logger.error("deploy.failed project=%s script=%s rc=%s duration=%.2fs log=%s stderr=%.500r",
+                         project_name, deploy_script, proc.returncode, duration, log_path,
+                         stderr.decode(errors='replace') if stderr else '')
                 
     except subprocess.TimeoutExpired:
-        logger.error(f"⏰ TIMEOUT: Deployment script exceeded 300 seconds")
-        logger.error(f"   Script: {deploy_script}")
+        record_failure('deploy')
+        logger.error("deploy.timeout project=%s script=%s timeout=%ss", project_name, deploy_script, DEPLOY_TIMEOUT)
     except FileNotFoundError:
-        logger.error(f"📁 FILE NOT FOUND: Deployment script does not exist")
-        logger.error(f"   Path: {deploy_script}")
+        record_failure('deploy')
+        logger.error("deploy.missing project=%s script=%s", project_name, deploy_script)
     except Exception as e:
-        logger.error(f"❌ ERROR: Deployment script execution exception - {e}")
+        record_failure('deploy')
+        logger.exception("deploy.error project=%s script=%s - %s", project_name, deploy_script, e)
 
-def save_webhook_event(project_name, payload_data, event_type):
-    """Save webhook event to MySQL database"""
+def stop_deployment(proc, project_name):
+    """Stop a timed-out deployment: SIGTERM its process group, then SIGKILL it after DEPLOY_KILL_GRACE seconds"""
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            # Fall back to the direct child; a root-owned sudo may refuse that too
+            try:
+                proc.send_signal(sig)
+            except PermissionError as e:
+                logger.error("deploy.kill_failed project=%s pid=%s signal=%s - %s", project_name, proc.pid, sig.name, e)
+        # Bounded waits, so a script that ignores signals cannot hold the worker and the project's deploy lock
+        try:
+            proc.communicate(timeout=DEPLOY_KILL_GRACE)
+            return
+        except subprocess.TimeoutExpired:
+            pass
+    logger.error("deploy.kill_failed project=%s pid=%s - still running %ss after SIGKILL, giving up on it",
+                 project_name, proc.pid, DEPLOY_KILL_GRACE)
+
+def save_webhook_event(project_name, webhook_event, event_type):
+    """Queue webhook event for the batched MySQL writer"""
     try:
-        logger.info(f"Saving webhook event for project: {project_name}, event: {event_type}")
-        # Extract data from payload
-        repository = payload_data.get('repository', {})
-        repo_name = repository.get('name', 'Unknown')
-        repo_url = repository.get('html_url', 'N/A')
-        clone_url = repository.get('clone_url', 'N/A')
-        ref = payload_data.get('ref', '')
-        branch = ref.split('/')[-1] if 'refs/heads/' in ref else 'Unknown'
-        
-        head_commit = payload_data.get('head_commit', {})
-        commit_message = head_commit.get('message', 'N/A')
-        commit_id = head_commit.get('id', 'N/A')
-        
-        author = head_commit.get('author', {})
-        author_name = author.get('name', 'Unknown')
-        author_email = author.get('email', 'Unknown')
+        repo_name = webhook_event.repo_name
+        branch = webhook_event.branch
+        # Clipped to the narrow event_type/commit_id/timestamp columns so one odd payload cannot fail a whole batch
+        params = (project_name, repo_name, webhook_event.repo_url, webhook_event.clone_url, event_type[:64], branch,
+                  webhook_event.commit_message, str(webhook_event.commit_id)[:64], webhook_event.author_name,
+                  webhook_event.author_email, str(webhook_event.timestamp)[:32])
         
-        timestamp = head_commit.get('timestamp', datetime.now().isoformat())
-        
-        query = f'''
-            INSERT INTO {TABLE_WEBHOOK_EVENTS} 
-            (project_name, repository_name, repository_url, clone_url, event_type, branch, commit_message, 
-             commit_id, author_name, author_email, timestamp)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        '''
+        start_workers(WORKER_COUNT)
+        try:
+            _events_q.put_nowait(params)
+        except queue.Full:
+            record_failure('event_dropped')
+            logger.error("Webhook event dropped for %s/%s: %s events already pending", repo_name, branch, EVENT_QUEUE_SIZE)
+            return
+        logger.debug("event.queued project=%s repo=%s branch=%s pending=%s", project_name, repo_name, branch, _events_q.qsize())
+    except Exception as e:
+        record_failure('event_save')
+        logger.exception("Error saving webhook event: %s", e)
+
+# Webhook event rows waiting to be inserted by the event writer thread
+_events_q = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+def _event_writer():
+    """Insert queued webhook events with one executemany per batch"""
+    batch_limit = EVENT_BATCH_MIN
+    while True:
+        rows = [_events_q.get()]
+        deadline = time.monotonic() + EVENT_FLUSH_INTERVAL
+        while len(rows) < batch_limit:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                rows.append(_events_q.get(timeout=remaining))
+            except queue.Empty:
+                break
         
-        params = (project_name, repo_name, repo_url, clone_url, event_type, branch, commit_message, 
-                  commit_id, author_name, author_email, timestamp)
+        try:
+            # While MySQL is down keep the batch and let new events queue up instead of failing every flush;
+            # a failed write is retried only if a fresh health check shows the database itself is down
+            while True:
+                while not _db_healthy.wait(DB_HEALTH_INTERVAL):
+                    logger.warning("Database unavailable, holding %s webhook events (%s queued)", len(rows), _events_q.qsize())
+                result = execute_many(INSERT_EVENT_SQL, rows)
+                if result is not None or check_database():
+                    break
+            
+            if result is None:
+                record_failure('event_save')
+                logger.error("Error saving %s webhook events: insert failed", len(rows))
+            else:
+                logger.info("Saved %s webhook events to database", len(rows))
+        except Exception as e:
+            record_failure('event_save')
+            logger.exception("Error saving %s webhook events: %s", len(rows), e)
+        finally:
+            for _ in rows:
+                _events_q.task_done()
         
-        execute_query(query, params)
-        logger.info(f"Webhook event saved successfully for {repo_name}/{branch}")
-    except Exception as e:
-        logger.error(f"Error saving webhook event: {e}")
+        # Grow the batch while bursts keep filling it, fall back once the queue drains
+        batch_limit = min(batch_limit * 2, EVENT_BATCH_MAX) if len(rows) == batch_limit else EVENT_BATCH_MIN
 
 # Global variable for projects
 PROJECTS = {}
@@ -350,20 +966,21 @@ def debug_info():
     """Show current configuration and status"""
     logger.info("Debug endpoint accessed")
     global PROJECTS
-    PROJECTS = load_projects_from_database()
+    PROJECTS = get_projects()
     
     return jsonify({
         "projects_count": len(PROJECTS),
         "projects": list(PROJECTS.keys()),
-        "project_details": {name: {k: v for k, v in config.items() if k != 'secret'} for name, config in PROJECTS.items()},
-        "database_connected": get_db_connection() is not None
+        "project_details": {name: {k: v for k, v in config.items() if k != 'secret' and not k.startswith('_')} for name, config in PROJECTS.items()},
+        "database_connected": _db_healthy.is_set(),
+        "failures": dict(FAILURE_COUNTS)
     })
 
 @app.route('/get-secrets', methods=['GET'])
 def get_secrets():
     """Get project secrets for testing"""
     global PROJECTS
-    PROJECTS = load_projects_from_database()
+    PROJECTS = get_projects()
     
     secrets_data = {}
     for project_key, config in PROJECTS.items():
@@ -371,45 +988,78 @@ def get_secrets():
     
     return jsonify({"secrets": secrets_data})
 
+# Columns returned by /webhook-events, in SELECT order; each also names its key in the JSON rows
+EVENT_LIST_COLUMNS = ('id', 'project_name', 'repository_name', 'repository_url', 'clone_url', 'event_type',
+                      'branch', 'commit_message', 'author_name', 'timestamp', 'created_at')
+
 @app.route('/webhook-events', methods=['GET'])
 def get_webhook_events():
-    """Get all webhook events from MySQL database"""
+    """Get the latest webhook events from MySQL database, ?limit= per page (default 50), optionally for one ?project="""
+    # Keyset pagination: pass ?before_created_at=<next_before_created_at>&before_id=<next_before_id> from the
+    # previous page to continue. The cursor follows the (created_at, id) sort order, so it bounds the range
+    # on the created_at index (InnoDB appends id to it) instead of an OFFSET scan; with ?project= it uses
+    # the (project_name, created_at) index instead.
+    # ?offset= is also accepted for simple clients but gets slower the deeper it goes.
+    project_name = request.args.get('project')
+    before_id = request.args.get('before_id', type=int)
+    before_created_at = request.args.get('before_created_at')
+    limit = min(max(request.args.get('limit', EVENTS_PAGE_SIZE, type=int), 1), EVENTS_PAGE_MAX)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    cursor = before_id is not None or before_created_at is not None
+    if cursor:
+        if offset:
+            return jsonify({"error": "Use either offset or before_created_at/before_id, not both"}), 400
+        try:
+            before_created_at = datetime.fromisoformat(before_created_at)
+        except (TypeError, ValueError):
+            before_created_at = None
+        if before_id is None or before_created_at is None:
+            return jsonify({"error": "before_created_at and before_id must be passed together, "
+                                     "as returned in next_before_created_at and next_before_id"}), 400
+    conditions = []
+    params = ()
+    if project_name:
+        conditions.append("project_name = %s")
+        params += (project_name,)
+    if cursor:
+        # Written out rather than as (created_at, id) < (%s, %s) so MySQL can use it as an index range
+        conditions.append("(created_at < %s OR (created_at = %s AND id < %s))")
+        params += (before_created_at, before_created_at, before_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    params += (limit, offset)
+    
     query = f'''
-        SELECT project_name, repository_name, repository_url, clone_url, event_type, branch, 
-               commit_message, author_name, timestamp, created_at
+        SELECT {', '.join(EVENT_LIST_COLUMNS)}
         FROM {TABLE_WEBHOOK_EVENTS} 
-        ORDER BY created_at DESC 
-        LIMIT 50
+        {where}
+        ORDER BY created_at DESC, id DESC 
+        LIMIT %s OFFSET %s
     '''
     
-    rows = execute_query(query, fetch=True)
+    rows = execute_query(query, params, fetch=True)
     
     if rows is None:
         return jsonify({"error": "Database connection failed"}), 500
     
-    events = []
-    for row in rows:
-        events.append({
-            "project_name": row[0],
-            "repository_name": row[1],
-            "repository_url": row[2],
-            "clone_url": row[3],
-            "event_type": row[4],
-            "branch": row[5],
-            "commit_message": row[6],
-            "author_name": row[7],
-            "timestamp": row[8],
-            "created_at": row[9]
-        })
-    
-    return jsonify({"events": events, "count": len(events)})
+    events = [dict(zip(EVENT_LIST_COLUMNS, row)) for row in rows]
+    more = len(events) == limit
+    
+    return jsonify({
+        "events": events,
+        "count": len(events),
+        "next_before_created_at": events[-1]["created_at"].isoformat(sep=' ') if more else None,
+        "next_before_id": events[-1]["id"] if more else None
+    })
+
+# Human-readable timestamp returned by /add-project
+_TIMESTAMP_FORMAT = '%d %b, %Y %I:%M %p'
 
 @app.route('/add-project', methods=['POST'])
 def add_project():
     """Add new project with auto-generated secret key"""
     logger.info("Add project endpoint accessed")
     data = request.json
-    if not data:
+    if not data or not isinstance(data, dict):
         logger.warning("No data received in add-project request")
         return jsonify({"error": "No data received"}), 400
 
@@ -418,37 +1068,55 @@ def add_project():
     slack_webhook = data.get("slack_webhook")
 
     if not all([name, deploy_script, slack_webhook]):
-        logger.warning(f"Missing required fields for project: {name}")
+        logger.warning("Missing required fields for project: %s", name)
         return jsonify({"error": "Missing required fields: name, deploy_script, slack_webhook"}), 400
 
+    if not isinstance(name, str) or not name.strip():
+        logger.warning("Invalid project name: %r", name)
+        return jsonify({"error": "name must be a non-empty string"}), 400
+
+    # Project names must be unique once normalised, since webhooks address projects by that key
+    if get_project_key(name) in get_projects():
+        logger.warning("Project already exists: %s", name)
+        return jsonify({"error": f"Project '{name}' already exists"}), 409
+
     try:
         # Generate secret key automatically
-        secret = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(64))
+        secret = secrets.token_urlsafe(48)  # 64 URL-safe characters
         
-        query = f"INSERT INTO {TABLE_PROJECTS} (name, deploy_script, slack_webhook, secret) VALUES (%s, %s, %s, %s)"
         params = (name, deploy_script, slack_webhook, secret)
         
-        result = execute_query(query, params)
-        
-        if result is None:
-            logger.error(f"Database connection failed while adding project: {name}")
+        connection = get_db_connection()
+        if not connection:
+            logger.error("Database connection failed while adding project: %s", name)
             return jsonify({"error": "Database connection failed"}), 500
         
+        # The cache check above can be stale (e.g. another worker just added it); the unique index is authoritative
+        try:
+            with connection, connection.cursor() as cursor:
+                cursor.execute(INSERT_PROJECT_SQL, params)
+        except IntegrityError as e:
+            if e.errno != errorcode.ER_DUP_ENTRY:
+                raise
+            logger.warning("Project already exists: %s", name)
+            return jsonify({"error": f"Project '{name}' already exists"}), 409
+        
         # Reload projects
         global PROJECTS
-        PROJECTS = load_projects_from_database()
+        invalidate_projects_cache()
+        PROJECTS = get_projects()
         
-        logger.info(f"Project '{name}' added successfully")
+        logger.info("Project '%s' added successfully", name)
         return jsonify({
             "message": f"Project '{name}' added successfully!",
             "project_name": name,
             "secret_key": secret,
-            "webhook_url": f"http://localhost:5000/webhook/main",
-            "timestamp": datetime.now().strftime('%d %b, %Y %I:%M %p')
+            "webhook_url": f"http://localhost:5000/webhook/{get_project_key(name)}/main",
+            "timestamp": datetime.now().strftime(_TIMESTAMP_FORMAT)
         }), 200
         
     except Exception as e:
-        logger.error(f"Database error while adding project '{name}': {e}")
+        logger.error("Database error while adding project '%s': %s", name, e)
         return jsonify({"error": f"Database error: {e}"}), 500
 
 @app.route('/test-webhook', methods=['POST'])
@@ -472,17 +1140,16 @@ def test_webhook():
 @app.route('/webhook-test/<branch>', methods=['POST'])
 def test_webhook_fast(branch):
     """Test fast webhook processing without signature validation"""
-    start_time = datetime.now()
+    start_time = time.perf_counter()
     
-    logger.info(f"🧪 TEST WEBHOOK: {branch} from {request.remote_addr}")
+    logger.info("TEST WEBHOOK: %s from %s", branch, request.remote_addr)
     
     payload_data = request.get_json()
     if not payload_data:
         return jsonify({"error": "No JSON data received"}), 400
     
     global PROJECTS
-    if not PROJECTS:
-        PROJECTS = load_projects_from_database()
+    PROJECTS = get_projects()
     
     # Use first available project for testing
     if not PROJECTS:
@@ -491,7 +1158,7 @@ def test_webhook_fast(branch):
     project_config = list(PROJECTS.values())[0]
     
     # IMMEDIATE RESPONSE
-    response_time = (datetime.now() - start_time).total_seconds() * 1000
+    response_time = (time.perf_counter() - start_time) * 1000
     
     response_data = {
         "status": "success",
@@ -506,21 +1173,18 @@ def test_webhook_fast(branch):
     try:
         event = request.headers.get('X-GitHub-Event', 'push')
         
-        logger.info(f"⚡ TEST FAST RESPONSE: {response_time:.2f}ms")
+        logger.info("TEST FAST RESPONSE: %.2fms", response_time)
         
-        # Create and start background thread
-        thread = threading.Thread(
-            target=process_webhook_background,
-            args=(project_config, payload_data, event),
-            name=f"test-webhook-{datetime.now().strftime('%H%M%S')}"
-        )
-        thread.daemon = True
-        thread.start()
+        # Hand off to the background workers
+        enqueue_job(process_webhook_background, project_config, payload_data, event)
         
-        logger.info(f"🧵 Test background thread started: {thread.name}")
+        logger.info("Test webhook queued for background processing (%s pending)", _work_q.qsize())
             
+    except queue.Full:
+        record_failure('queue_full')
+        return jsonify({"error": "Webhook queue is full, retry later"}), 503
     except Exception as e:
-        logger.error(f"❌ TEST ERROR: {e}")
+        logger.error("TEST ERROR: %s", e)
         response_data["warning"] = str(e)
     
     return jsonify(response_data)
@@ -532,8 +1196,7 @@ def test_slack_simple():
     project_name = data.get('project_name', 'Another Project')
     
     global PROJECTS
-    if not PROJECTS:
-        PROJECTS = load_projects_from_database()
+    PROJECTS = get_projects()
     
     # Find project
     project_config = None
@@ -561,7 +1224,7 @@ def test_slack_simple():
     }
     
     # Send Slack notification
-    send_slack_notification(project_config['slack_webhook'], test_payload, project_config['name'])
+    send_slack_notification(project_config['slack_webhook'], WebhookEvent.from_payload(test_payload), project_config['name'])
     
     return jsonify({
         "status": "success",
@@ -573,8 +1236,7 @@ def test_slack_simple():
 def test_slack_notification(project_name):
     """Test Slack notification for a specific project"""
     global PROJECTS
-    if not PROJECTS:
-        PROJECTS = load_projects_from_database()
+    PROJECTS = get_projects()
     
     # URL decode project name
     import urllib.parse
@@ -584,7 +1246,7 @@ def test_slack_notification(project_name):
     project_config = None
     for proj_key, config in PROJECTS.items():
         if (config['name'].lower() == project_name.lower() or 
-            proj_key.lower() == project_name.lower().replace(' ', '_').replace('-', '_')):
+            proj_key.lower() == get_project_key(project_name)):
             project_config = config
             break
     
@@ -607,7 +1269,7 @@ def test_slack_notification(project_name):
     }
     
     # Send test Slack notification
-    send_slack_notification(project_config['slack_webhook'], test_payload, project_config['name'])
+    send_slack_notification(project_config['slack_webhook'], WebhookEvent.from_payload(test_payload), project_config['name'])
     
     return jsonify({
         "status": "success",
@@ -615,50 +1277,68 @@ def test_slack_notification(project_name):
         "slack_webhook": project_config['slack_webhook'][:50] + "..."
     })
 
+@app.route('/webhook/<project>/<branch>', methods=['POST'])
 @app.route('/webhook/<branch>', methods=['POST'])
-def handle_webhook(branch):
+def handle_webhook(branch, project=None):
     """Handle incoming Git webhook events - FAST response with background processing"""
-    start_time = datetime.now()
-    
-    log_section("WEBHOOK RECEIVED", {
-        "Branch": branch,
-        "Client IP": request.remote_addr,
-        "Content Length": len(request.data),
-        "Event Type": request.headers.get('X-GitHub-Event', 'unknown'),
-        "Timestamp": start_time.strftime('%Y-%m-%d %H:%M:%S')
-    })
-    
-    payload = request.data
-    received_signature = request.headers.get('X-Hub-Signature-256', '')
+    start_time = time.perf_counter()
     
-    logger.info(f"🔐 Fast signature validation...")
+    # The header format was checked in before_request; decode it once to compare raw 32-byte digests
+    expected_digest = bytes.fromhex(request.headers['X-Hub-Signature-256'][7:])
     
     global PROJECTS
-    if not PROJECTS:
-        PROJECTS = load_projects_from_database()
+    PROJECTS = get_projects()
+    
+    # Resolve the project from the URL, or from the legacy header, so only one HMAC is computed
+    project_header = request.headers.get('X-GitHub-Project', '')
+    if project:
+        project_key = get_project_key(project)
+        if project_key not in PROJECTS:
+            logger.warning("UNKNOWN PROJECT: %s from %s", project, request.remote_addr)
+            return jsonify({"error": f"Unknown project '{project}'"}), 404
+        candidates = [(project_key, PROJECTS[project_key])]
+    elif project_header:
+        logger.warning("DEPRECATED ROUTE: /webhook/%s from %s, use /webhook/<project>/%s", branch, request.remote_addr, branch)
+        project_key = get_project_key(project_header)
+        if project_key not in PROJECTS:
+            logger.warning("UNKNOWN PROJECT: %s from %s", project_header, request.remote_addr)
+            return jsonify({"error": f"Unknown project '{project_header}'"}), 400
+        candidates = [(project_key, PROJECTS[project_key])]
+    elif SIGNATURE_SCAN_FALLBACK:
+        logger.warning("DEPRECATED ROUTE: /webhook/%s from %s, use /webhook/<project>/%s", branch, request.remote_addr, branch)
+        candidates = PROJECTS.items()
+    else:
+        logger.warning("MISSING PROJECT HEADER: %s from %s", branch, request.remote_addr)
+        return jsonify({"error": "Missing X-GitHub-Project header"}), 400
+    
+    # Fast signature validation: feed the body to every candidate MAC as it is read
+    macs = [(project_name, config, config["_hmac_template"].copy())
+            for project_name, config in candidates if config.get("_hmac_template")]
+    payload = bytearray()
+    for chunk in iter(lambda: request.stream.read(STREAM_CHUNK_SIZE), b''):
+        payload += chunk
+        # Bodies without a Content-Length are only measured here
+        if len(payload) > MAX_PAYLOAD_SIZE:
+            logger.warning("PAYLOAD TOO LARGE: over %s bytes from %s", MAX_PAYLOAD_SIZE, request.remote_addr)
+            return jsonify({"error": f"Payload exceeds {MAX_PAYLOAD_SIZE} bytes"}), 413
+        for _, _, mac in macs:
+            mac.update(chunk)
     
-    # Fast signature validation
     matching_project = None
     project_config = None
     
-    for project_name, config in PROJECTS.items():
-        secret = config.get("secret", "")
-        if not secret:
-            continue
-
-        computed_signature = 'sha256=' + hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
-        if hmac.compare_digest(computed_signature, received_signature):
+    # Check every candidate even after a match, so a rejected request costs the same as an accepted one
+    for project_name, config, mac in macs:
+        if hmac.compare_digest(mac.digest(), expected_digest) and matching_project is None:
             matching_project = project_name
             project_config = config
-            logger.info(f"✅ VALIDATED: {config['name']}")
-            break
 
     if not matching_project:
-        logger.warning(f"⚠️ INVALID SIGNATURE: {branch} from {request.remote_addr}")
+        logger.warning("INVALID SIGNATURE: %s from %s", branch, request.remote_addr)
         return jsonify({"error": "Invalid signature"}), 403
     
     # IMMEDIATE RESPONSE - Don't wait for processing
-    response_time = (datetime.now() - start_time).total_seconds() * 1000
+    response_time = (time.perf_counter() - start_time) * 1000
     
     response_data = {
         "status": "success",
@@ -670,24 +1350,33 @@ def handle_webhook(branch):
     
     # Start background processing in separate thread
     try:
-        payload_data = json.loads(payload)
+        # Parse the same raw bytes that were verified, exactly once
+        payload_data = orjson.loads(payload) if payload else {}
         event = request.headers.get('X-GitHub-Event', 'push')
         
-        logger.info(f"⚡ FAST RESPONSE: {response_time:.2f}ms - Starting background thread")
+        # Hand off to the background workers
+        enqueue_job(process_webhook_background, project_config, payload_data, event)
         
-        # Create and start background thread
-        thread = threading.Thread(
-            target=process_webhook_background,
-            args=(project_config, payload_data, event),
-            name=f"webhook-{project_config['name']}-{datetime.now().strftime('%H%M%S')}"
-        )
-        thread.daemon = True
-        thread.start()
+        logger.info("webhook.received project=%s branch=%s event=%s ip=%s bytes=%s response_ms=%.2f pending=%s",
+                    project_config['name'], branch, event, request.remote_addr, len(payload), response_time,
+                    _work_q.qsize())
         
-        logger.info(f"🧵 Background thread started: {thread.name}")
+        # 202 Accepted: the work is queued, not done
+        return jsonify(response_data), 202
             
+    except queue.Full:
+        record_failure('queue_full')
+        logger.error("QUEUE FULL: rejecting webhook for %s, %s jobs already pending", project_config['name'], WORK_QUEUE_SIZE)
+        response = jsonify({"error": "Webhook queue is full, retry later"})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    except orjson.JSONDecodeError as e:
+        record_failure('payload_parse')
+        logger.warning("INVALID PAYLOAD: %s sent a body that is not valid JSON - %s", project_config['name'], e)
+        response_data["warning"] = "Background processing failed to start"
     except Exception as e:
-        logger.error(f"❌ ERROR: Failed to start background processing - {e}")
+        record_failure('enqueue')
+        logger.exception("ERROR: Failed to start background processing - %s", e)
         response_data["warning"] = "Background processing failed to start"
     
     return jsonify(response_data)
@@ -704,7 +1393,8 @@ log_section("APPLICATION STARTUP", {
 })
 
 init_database()
-PROJECTS = load_projects_from_database()
+check_database()
+PROJECTS = get_projects()
 
 # Start the Flask app if the script is run directly
 if __name__ == '__main__':
@@ -718,8 +1408,8 @@ if __name__ == '__main__':
         "Projects Loaded": len(PROJECTS),
         "Config File": "config.json"
     })
-    logger.info("🚀 Starting Flask application...")
-    logger.info(f"📡 Server will be accessible at: http://localhost:{app_port}")
-    logger.info(f"🔗 Webhook endpoint: http://localhost:{app_port}/webhook/<branch>")
-    logger.info(f"📊 Debug endpoint: http://localhost:{app_port}/debug")
-    app.run(host=app_host, port=app_port)
+    logger.info("Starting Flask application...")
+    logger.info("Server will be accessible at: http://localhost:%s", app_port)
+    logger.info("Webhook endpoint: http://localhost:%s/webhook/<project>/<branch>", app_port)
+    logger.info("Debug endpoint: http://localhost:%s/debug", app_port)
+    app.run(host=app_host, port=app_port, threaded=True)
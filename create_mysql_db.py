@@ -1,14 +1,32 @@
 import mysql.connector
 from mysql.connector import Error
 import secrets
-import string
 import os
+import re
 from dotenv import load_dotenv
+from db_config import ensure_index
 
 load_dotenv()
 
+# Database names are interpolated into CREATE DATABASE/USE, which cannot take parameters
+DB_NAME_PATTERN = re.compile(r'[A-Za-z0-9_]+')
+
+# Sample projects seeded into a new database, as (name, deploy_script, slack_webhook)
+SAMPLE_PROJECTS = (
+    ("My First Project", "/path/to/my_first_project/deploy_script.sh", "https://hooks.slack.com/services/XXX/YYY/ZZZ"),
+    ("Another Project", "/path/to/another_project/deploy_script.sh", "https://hooks.slack.com/services/AAA/BBB/CCC"),
+    ("Test Project", "/path/to/test/deploy.sh", "https://hooks.slack.com/test")
+)
+INSERT_PROJECT_SQL = "INSERT INTO projects (name, deploy_script, slack_webhook, secret) VALUES (%s, %s, %s, %s)"
+
 def create_mysql_database():
     """Create MySQL database and tables"""
+    db_name = os.getenv('DB_NAME', 'git_webhooks')
+    if not DB_NAME_PATTERN.fullmatch(db_name):
+        print(f"Invalid DB_NAME '{db_name}': use only letters, digits and underscores")
+        return
+    
+    connection = None
     try:
         # Connect to MySQL server (without database)
         connection = mysql.connector.connect(
@@ -17,11 +35,13 @@ def create_mysql_database():
             password=os.getenv('DB_PASSWORD', ''),
             port=int(os.getenv('DB_PORT', 3306))
         )
+        # The seed rows are written in one transaction and committed once at the end
+        # (MySQL commits DDL implicitly, so only the INSERTs are covered)
+        connection.autocommit = False
         
         cursor = connection.cursor()
         
         # Create database
-        db_name = os.getenv('DB_NAME', 'git_webhooks')
         cursor.execute(f"CREATE DATABASE IF NOT EXISTS {db_name}")
         cursor.execute(f"USE {db_name}")
         
@@ -44,38 +64,50 @@ def create_mysql_database():
                 repository_name VARCHAR(255),
                 repository_url TEXT,
                 clone_url TEXT,
-                event_type VARCHAR(100),
+                event_type VARCHAR(64),
                 branch VARCHAR(255),
                 commit_message TEXT,
-                commit_id VARCHAR(255),
+                commit_id VARCHAR(64),
                 author_name VARCHAR(255),
                 author_email VARCHAR(255),
-                timestamp VARCHAR(255),
+                timestamp VARCHAR(32),
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
-        # Add sample projects
-        projects = [
-            ("My First Project", "/path/to/my_first_project/deploy_script.sh", "https://hooks.slack.com/services/XXX/YYY/ZZZ"),
-            ("Another Project", "/path/to/another_project/deploy_script.sh", "https://hooks.slack.com/services/AAA/BBB/CCC"),
-            ("Test Project", "/path/to/test/deploy.sh", "https://hooks.slack.com/test")
-        ]
+        # Sample projects are only added to an empty projects table, so re-running the script is safe
+        cursor.execute("SELECT 1 FROM projects LIMIT 1")
+        seeded = cursor.fetchone() is None
+        if seeded:
+            # One executemany call: the connector sends every row in a single multi-row INSERT.
+            # Only the secrets are generated per run: 24 random bytes -> 32 URL-safe characters from one os.urandom call.
+            rows = [(name, script, webhook, secrets.token_urlsafe(24)) for name, script, webhook in SAMPLE_PROJECTS]
+            cursor.executemany(INSERT_PROJECT_SQL, rows)
+            connection.commit()
         
-        for name, script, webhook in projects:
-            secret = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(32))
-            cursor.execute(
-                "INSERT INTO projects (name, deploy_script, slack_webhook, secret) VALUES (%s, %s, %s, %s)",
-                (name, script, webhook, secret)
-            )
+        if seeded:
+            print(f"MySQL database '{db_name}' created successfully with sample projects!")
+        else:
+            print(f"MySQL database '{db_name}' is up to date; projects already exist, so no sample projects were added")
+        
+        # Secondary indexes are added after the seed rows, so a large seed builds each index
+        # once instead of updating it row by row; add new indexes here, not in CREATE TABLE.
+        # The seed is already committed, so an index failure is reported on its own.
+        try:
+            ensure_index(cursor, 'webhook_events', 'idx_events_created_at', 'created_at')
+            ensure_index(cursor, 'webhook_events', 'idx_events_project_created_at', 'project_name, created_at')
+        except Error as e:
+            print(f"Error creating indexes on webhook_events (tables and sample projects were kept): {e}")
         
-        connection.commit()
         cursor.close()
-        connection.close()
-        print(f"MySQL database '{db_name}' created successfully with sample projects!")
         
     except Error as e:
         print(f"Error creating MySQL database: {e}")
+        if connection and connection.is_connected():
+            connection.rollback()
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
 
 if __name__ == '__main__':
     create_mysql_database()
\ No newline at end of file
@@ -1,27 +1,60 @@
 import mysql.connector
 import os
-from mysql.connector import Error
+import logging
+import threading
+from mysql.connector import Error, pooling
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 load_dotenv()
-# Database configuration
-DB_CONFIG = {
+logger = logging.getLogger(__name__)
+
+# Database configuration, read from the environment once at import and read-only afterwards
+DB_CONFIG = MappingProxyType({
     'host': os.getenv('DB_HOST', 'localhost'),
     'database': os.getenv('DB_NAME', 'git_webhooks'),
     'user': os.getenv('DB_USER', 'root'),
     'password': os.getenv('DB_PASSWORD', ''),
     'port': int(os.getenv('DB_PORT', 3306))
-}
+})
+
+# Shared connection pool, created on first use and again in each forked worker process.
+# The pool opens all its connections up front, so every process holds DB_POOL_SIZE of them; the default
+# covers one process's request threads (GUNICORN_THREADS) plus the event writer, projects refresher and
+# db-health threads. Capped at the connector's limit of 32 per pool.
+DB_BACKGROUND_CONNECTIONS = 3
+DB_POOL_SIZE = min(int(os.getenv('DB_POOL_SIZE', int(os.getenv('GUNICORN_THREADS', 8)) + DB_BACKGROUND_CONNECTIONS)),
+                   pooling.CNX_POOL_MAXSIZE)
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
 
 def get_db_connection():
-    """Get MySQL database connection"""
+    """Get MySQL database connection from the pool; close() returns it to the pool"""
+    global _pool, _pool_pid
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
+        if _pool is None or _pool_pid != os.getpid():
+            # Locked so threads racing on first use share one pool instead of each building its own
+            with _pool_lock:
+                if _pool is None or _pool_pid != os.getpid():
+                    # Autocommit: every statement run here is a single statement, so no COMMIT round trip is needed
+                    _pool = pooling.MySQLConnectionPool(pool_name='git_webhooks', pool_size=DB_POOL_SIZE,
+                                                        pool_reset_session=True, autocommit=True, **DB_CONFIG)
+                    _pool_pid = os.getpid()
+        return _pool.get_connection()
     except Error as e:
-        print(f"Error connecting to MySQL: {e}")
+        logger.error("Error connecting to MySQL: %s", e)
         return None
 
+def close_pool():
+    """Close the idle pooled connections and drop the pool; the next get_db_connection() opens a new one"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        pool, _pool, _pool_pid = _pool, None, None
+    if pool is not None:
+        # The connector has no public close for a pool; this disconnects every connection not checked out
+        pool._remove_connections()
+
 def execute_query(query, params=None, fetch=False):
     """Execute MySQL query"""
     connection = get_db_connection()
@@ -29,20 +62,32 @@ def execute_query(query, params=None, fetch=False):
         return None
     
     try:
-        cursor = connection.cursor()
-        cursor.execute(query, params or ())
-        
-        if fetch:
-            result = cursor.fetchall()
-        else:
-            connection.commit()
-            result = cursor.rowcount
-            
-        cursor.close()
-        connection.close()
-        return result
+        # Leaving the with blocks closes the cursor and returns the connection to the pool
+        with connection, connection.cursor() as cursor:
+            cursor.execute(query, params or ())
+            return cursor.fetchall() if fetch else cursor.rowcount
+    except Error as e:
+        logger.error("Database error: %s", e)
+        return None
+
+def execute_many(query, rows):
+    """Execute MySQL query for every row in rows; INSERTs are sent as one multi-row statement"""
+    connection = get_db_connection()
+    if not connection:
+        return None
+    
+    try:
+        with connection, connection.cursor() as cursor:
+            cursor.executemany(query, rows)
+            return cursor.rowcount
     except Error as e:
-        print(f"Database error: {e}")
-        if connection:
-            connection.close()
+        logger.error("Database error: %s", e)
         return None
+
+def ensure_index(cursor, table, index_name, columns, unique=False):
+    """Create an index unless it already exists (MySQL has no CREATE INDEX IF NOT EXISTS)"""
+    cursor.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (index_name,))
+    if cursor.fetchall():
+        return
+    cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {index_name} ON {table} ({columns})")
+    logger.info("Created index %s on %s(%s)", index_name, table, columns)
@@ -0,0 +1,32 @@
+# File: gunicorn_conf.py
+# Author: Jay Chauhan
+# Website: www.dj-jay.in
+# Description:
+# Gunicorn settings for running the webhook handler in production.
+# Usage: gunicorn -c gunicorn_conf.py wsgi:app
+
+import os
+
+# Address to listen on; Nginx proxies to this (see README)
+bind = os.getenv('GUNICORN_BIND', '127.0.0.1:8000')
+
+# Threaded workers so blocking Slack/MySQL I/O overlaps across requests.
+# Deployments are serialized per project across workers with lock files, but the Slack rate limit
+# is kept per worker, so each worker may post at the full rate.
+workers = int(os.getenv('GUNICORN_WORKERS', (2 * (os.cpu_count() or 1)) + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+keepalive = 5
+
+# Import the app (and run database initialization) once in the master before forking.
+# Background worker threads are started lazily inside each forked worker.
+preload_app = True
+
+def when_ready(server):
+    """Close the MySQL pool the preloaded app opened in the master; each worker opens its own after the fork"""
+    from db_config import close_pool
+    close_pool()
+
+# Every worker writes webhook_app.log, so in-app size rotation would have each process rotate it
+# on its own; rotate it with logrotate instead (see README) unless overridden
+os.environ.setdefault('LOG_ROTATION', 'external')
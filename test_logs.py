@@ -1,45 +1,57 @@
 #!/usr/bin/env python3
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 
 # Test the logging by making requests to different endpoints
 base_url = "http://localhost:5000"
 
+# One keep-alive session shared by every test request
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+# Network failures reported per request; anything else is a bug in this script and propagates
+REQUEST_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+# Seconds to wait for each response, so a stuck app cannot hang the script
+REQUEST_TIMEOUT = 5
+
+# (label, method, path, JSON body) for each request; the first one also checks the app is running
+TESTS = [
+    ("Index", "GET", "/", None),
+    ("Debug", "GET", "/debug", None),
+    # Will generate error logs
+    ("Add project (empty)", "POST", "/add-project", {}),
+    ("Add project (valid)", "POST", "/add-project", {
+        "name": "Test Log Project",
+        "deploy_script": "/test/script.sh",
+        "slack_webhook": "https://hooks.slack.com/test"
+    }),
+]
+
+def run_test(label, method, path, body):
+    response = session.request(method, f"{base_url}{path}", json=body, timeout=REQUEST_TIMEOUT)
+    return f"{label}: {response.status_code}"
+
 def test_endpoints():
     print("Testing logging endpoints...")
-    
-    # Test 1: Index endpoint
+
+    # The first request runs on its own so the others are skipped when the app is down
     try:
-        response = requests.get(f"{base_url}/")
-        print(f"Index: {response.status_code}")
-    except:
+        print(run_test(*TESTS[0]))
+    except REQUEST_ERRORS:
         print("App not running - start with: python app.py")
         return
-    
-    # Test 2: Debug endpoint
-    try:
-        response = requests.get(f"{base_url}/debug")
-        print(f"Debug: {response.status_code}")
-    except:
-        pass
-    
-    # Test 3: Add project (will generate error logs)
-    try:
-        response = requests.post(f"{base_url}/add-project", json={})
-        print(f"Add project (empty): {response.status_code}")
-    except:
-        pass
-    
-    # Test 4: Valid add project
-    try:
-        response = requests.post(f"{base_url}/add-project", json={
-            "name": "Test Log Project",
-            "deploy_script": "/test/script.sh",
-            "slack_webhook": "https://hooks.slack.com/test"
-        })
-        print(f"Add project (valid): {response.status_code}")
-    except:
-        pass
+
+    # The rest run concurrently and are printed as they finish
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {executor.submit(run_test, *test): test[0] for test in TESTS[1:]}
+        for future in as_completed(futures):
+            try:
+                print(future.result())
+            except REQUEST_ERRORS as e:
+                print(f"{futures[future]}: failed - {e}")
 
 if __name__ == "__main__":
-    test_endpoints()
\ No newline at end of file
+    test_endpoints()
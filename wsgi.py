@@ -0,0 +1,8 @@
+# File: wsgi.py
+# Author: Jay Chauhan
+# Website: www.dj-jay.in
+# Description:
+# WSGI entry point for production servers.
+# Usage: gunicorn -c gunicorn_conf.py wsgi:app
+
+from app import app